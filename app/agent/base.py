@@ -147,12 +147,20 @@ class BaseAgent(BaseModel, ABC):
                 results.append(f"Step {self.current_step}: {step_result}")
 
             if self.current_step >= self.max_steps:
+                # A task finished on its last allowed step did not run out of steps
+                if self.state != AgentState.FINISHED:
+                    results.append(f"Terminated: Reached max steps ({self.max_steps})")
                 self.current_step = 0
                 self.state = AgentState.IDLE
-                results.append(f"Terminated: Reached max steps ({self.max_steps})")
         await SANDBOX_CLIENT.cleanup()
         return "\n".join(results) if results else "No steps executed"
 
+    async def warmup(self) -> None:
+        """Prepare resources needed by the first step ahead of time.
+
+        Does nothing by default; subclasses with lazy setup can override it.
+        """
+
     @abstractmethod
     async def step(self) -> str:
         """Execute a single step in the agent's workflow.
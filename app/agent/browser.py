@@ -7,12 +7,20 @@ from app.agent.toolcall import ToolCallAgent
 from app.logger import logger
 from app.prompt.browser import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import Message, ToolChoice
-from app.tool import BrowserUseTool, Terminate, ToolCollection
+from app.tool import BROWSER_TOOL_NAME, Terminate, ToolCollection
 
 
 # Avoid circular import if BrowserAgent needs BrowserContextHelper
 if TYPE_CHECKING:
     from app.agent.base import BaseAgent  # Or wherever memory is defined
+    from app.tool.browser_use_tool import BrowserUseTool
+
+
+def create_browser_tool() -> "BrowserUseTool":
+    """Create the browser tool, importing browser_use only when it is needed."""
+    from app.tool.browser_use_tool import BrowserUseTool
+
+    return BrowserUseTool()
 
 
 class BrowserContextHelper:
@@ -21,7 +29,7 @@ class BrowserContextHelper:
         self._current_base64_image: Optional[str] = None
 
     async def get_browser_state(self) -> Optional[dict]:
-        browser_tool = self.agent.available_tools.get_tool(BrowserUseTool().name)
+        browser_tool = self.agent.available_tools.get_tool(BROWSER_TOOL_NAME)
         if not browser_tool or not hasattr(browser_tool, "get_current_state"):
             logger.warning("BrowserUseTool not found or doesn't have get_current_state")
             return None
@@ -74,7 +82,7 @@ class BrowserContextHelper:
         )
 
     async def cleanup_browser(self):
-        browser_tool = self.agent.available_tools.get_tool(BrowserUseTool().name)
+        browser_tool = self.agent.available_tools.get_tool(BROWSER_TOOL_NAME)
         if browser_tool and hasattr(browser_tool, "cleanup"):
             await browser_tool.cleanup()
 
@@ -98,7 +106,7 @@ class BrowserAgent(ToolCallAgent):
 
     # Configure the available tools
     available_tools: ToolCollection = Field(
-        default_factory=lambda: ToolCollection(BrowserUseTool(), Terminate())
+        default_factory=lambda: ToolCollection(create_browser_tool(), Terminate())
     )
 
     # Use Auto for tool choice to allow both tool usage and free-form responses
@@ -2,14 +2,14 @@ from typing import Dict, List, Optional
 
 from pydantic import Field, model_validator
 
-from app.agent.browser import BrowserContextHelper
+from app.agent.browser import BrowserContextHelper, create_browser_tool
 from app.agent.toolcall import ToolCallAgent
-from app.config import config
+from app.config import MCPServerConfig, config
 from app.logger import logger
 from app.prompt.manus import NEXT_STEP_PROMPT, SYSTEM_PROMPT
-from app.tool import Terminate, ToolCollection
+from app.schema import ToolCall
+from app.tool import BROWSER_TOOL_NAME, Terminate, ToolCollection
 from app.tool.ask_human import AskHuman
-from app.tool.browser_use_tool import BrowserUseTool
 from app.tool.mcp import MCPClients, MCPClientTool
 from app.tool.python_execute import PythonExecute
 from app.tool.str_replace_editor import StrReplaceEditor
@@ -34,7 +34,7 @@ class Manus(ToolCallAgent):
     available_tools: ToolCollection = Field(
         default_factory=lambda: ToolCollection(
             PythonExecute(),
-            BrowserUseTool(),
+            create_browser_tool(),
             StrReplaceEditor(),
             AskHuman(),
             Terminate(),
@@ -49,6 +49,8 @@ class Manus(ToolCallAgent):
         default_factory=dict
     )  # server_id -> url/command
     _initialized: bool = False
+    # Step in which the browser tool was last dispatched
+    _last_browser_step: int = -1
 
     @model_validator(mode="after")
     def initialize_helper(self) -> "Manus":
@@ -66,27 +68,35 @@ class Manus(ToolCallAgent):
 
     async def initialize_mcp_servers(self) -> None:
         """Initialize connections to configured MCP servers."""
+        # Connect one at a time: each MCP session's context managers must be
+        # entered and exited on the same task, so they can't run under gather
         for server_id, server_config in config.mcp_config.servers.items():
-            try:
-                if server_config.type == "sse":
-                    if server_config.url:
-                        await self.connect_mcp_server(server_config.url, server_id)
-                        logger.info(
-                            f"Connected to MCP server {server_id} at {server_config.url}"
-                        )
-                elif server_config.type == "stdio":
-                    if server_config.command:
-                        await self.connect_mcp_server(
-                            server_config.command,
-                            server_id,
-                            use_stdio=True,
-                            stdio_args=server_config.args,
-                        )
-                        logger.info(
-                            f"Connected to MCP server {server_id} using command {server_config.command}"
-                        )
-            except Exception as e:
-                logger.error(f"Failed to connect to MCP server {server_id}: {e}")
+            await self._initialize_mcp_server(server_id, server_config)
+
+    async def _initialize_mcp_server(
+        self, server_id: str, server_config: MCPServerConfig
+    ) -> None:
+        """Connect to a single configured MCP server, logging any failure."""
+        try:
+            if server_config.type == "sse":
+                if server_config.url:
+                    await self.connect_mcp_server(server_config.url, server_id)
+                    logger.info(
+                        f"Connected to MCP server {server_id} at {server_config.url}"
+                    )
+            elif server_config.type == "stdio":
+                if server_config.command:
+                    await self.connect_mcp_server(
+                        server_config.command,
+                        server_id,
+                        use_stdio=True,
+                        stdio_args=server_config.args,
+                    )
+                    logger.info(
+                        f"Connected to MCP server {server_id} using command {server_config.command}"
+                    )
+        except Exception as e:
+            logger.error(f"Failed to connect to MCP server {server_id}: {e}")
 
     async def connect_mcp_server(
         self,
@@ -137,20 +147,26 @@ class Manus(ToolCallAgent):
             await self.disconnect_mcp_server()
             self._initialized = False
 
-    async def think(self) -> bool:
-        """Process current state and decide next actions with appropriate context."""
+    async def warmup(self) -> None:
+        """Connect to the configured MCP servers if not already done."""
         if not self._initialized:
             await self.initialize_mcp_servers()
             self._initialized = True
 
+    async def run(self, request: Optional[str] = None) -> str:
+        """Run the agent, forgetting browser use recorded by earlier runs."""
+        # Guard against a stale _last_browser_step from the previous run:
+        # current_step is not always reset between runs, so the last step of
+        # that run could otherwise pass for the previous step of this one
+        self._last_browser_step = -1
+        return await super().run(request)
+
+    async def think(self) -> bool:
+        """Process current state and decide next actions with appropriate context."""
+        await self.warmup()
+
         original_prompt = self.next_step_prompt
-        recent_messages = self.memory.messages[-3:] if self.memory.messages else []
-        browser_in_use = any(
-            tc.function.name == BrowserUseTool().name
-            for msg in recent_messages
-            if msg.tool_calls
-            for tc in msg.tool_calls
-        )
+        browser_in_use = self._last_browser_step == self.current_step - 1
 
         if browser_in_use:
             self.next_step_prompt = (
@@ -163,3 +179,9 @@ class Manus(ToolCallAgent):
         self.next_step_prompt = original_prompt
 
         return result
+
+    async def execute_tool(self, command: ToolCall) -> str:
+        """Execute a tool call, recording the step if it drives the browser."""
+        if command and command.function and command.function.name == BROWSER_TOOL_NAME:
+            self._last_browser_step = self.current_step
+        return await super().execute_tool(command)
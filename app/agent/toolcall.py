@@ -1,6 +1,6 @@
 import asyncio
 import json
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import Field
 
@@ -24,14 +24,16 @@ class ToolCallAgent(ReActAgent):
     system_prompt: str = SYSTEM_PROMPT
     next_step_prompt: str = NEXT_STEP_PROMPT
 
-    available_tools: ToolCollection = ToolCollection(
-        CreateChatCompletion(), Terminate()
+    available_tools: ToolCollection = Field(
+        default_factory=lambda: ToolCollection(CreateChatCompletion(), Terminate())
     )
     tool_choices: TOOL_CHOICE_TYPE = ToolChoice.AUTO  # type: ignore
     special_tool_names: List[str] = Field(default_factory=lambda: [Terminate().name])
 
     tool_calls: List[ToolCall] = Field(default_factory=list)
-    _current_base64_image: Optional[str] = None
+    # Screenshots returned by tools, keyed by tool call id
+    _tool_images: Dict[str, str] = {}
+    _system_message: Optional[Message] = None
 
     max_steps: int = 30
     max_observe: Optional[Union[int, bool]] = None
@@ -47,9 +49,7 @@ class ToolCallAgent(ReActAgent):
             response = await self.llm.ask_tool(
                 messages=self.messages,
                 system_msgs=(
-                    [Message.system_message(self.system_prompt)]
-                    if self.system_prompt
-                    else None
+                    [self._get_system_message()] if self.system_prompt else None
                 ),
                 tools=self.available_tools.to_params(),
                 tool_choice=self.tool_choices,
@@ -128,6 +128,15 @@ class ToolCallAgent(ReActAgent):
             )
             return False
 
+    def _get_system_message(self) -> Message:
+        """Return the system message, rebuilding it only when the prompt changes"""
+        if (
+            self._system_message is None
+            or self._system_message.content != self.system_prompt
+        ):
+            self._system_message = Message.system_message(self.system_prompt)
+        return self._system_message
+
     async def act(self) -> str:
         """Execute tool calls and handle their results"""
         if not self.tool_calls:
@@ -137,18 +146,28 @@ class ToolCallAgent(ReActAgent):
             # Return last message content if no tool calls
             return self.messages[-1].content or "No content or commands to execute"
 
-        results = []
+        # Tool calls can depend on each other, so they run in the order issued;
+        # only consecutive calls to concurrency-safe tools are run together
+        outputs = []
+        batch = []
         for command in self.tool_calls:
-            # Reset base64_image for each tool call
-            self._current_base64_image = None
-
-            result = await self.execute_tool(command)
+            if self._is_concurrency_safe(command):
+                batch.append(command)
+                continue
+            outputs.extend(await self._execute_tools(batch))
+            batch = []
+            outputs.append(await self.execute_tool(command))
+        outputs.extend(await self._execute_tools(batch))
 
+        results = []
+        for command, result in zip(self.tool_calls, outputs):
             if self.max_observe:
                 result = result[: self.max_observe]
 
             logger.info(
-                f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
+                "🎯 Tool '{}' completed its mission! Result: {}",
+                command.function.name,
+                result,
             )
 
             # Add tool response to memory
@@ -156,13 +175,27 @@ class ToolCallAgent(ReActAgent):
                 content=result,
                 tool_call_id=command.id,
                 name=command.function.name,
-                base64_image=self._current_base64_image,
+                base64_image=self._tool_images.pop(command.id, None),
             )
             self.memory.add_message(tool_msg)
             results.append(result)
 
         return "\n\n".join(results)
 
+    def _is_concurrency_safe(self, command: ToolCall) -> bool:
+        """Check whether a tool call targets a tool that opted into concurrent runs"""
+        name = command.function.name if command and command.function else None
+        tool = self.available_tools.get_tool(name) if name else None
+        return bool(tool and tool.concurrency_safe)
+
+    async def _execute_tools(self, commands: List[ToolCall]) -> List[str]:
+        """Execute concurrency-safe tool calls together, keeping their order"""
+        if len(commands) <= 1:
+            return [await self.execute_tool(command) for command in commands]
+        return list(
+            await asyncio.gather(*(self.execute_tool(command) for command in commands))
+        )
+
     async def execute_tool(self, command: ToolCall) -> str:
         """Execute a single tool call with robust error handling"""
         if not command or not command.function or not command.function.name:
@@ -186,24 +219,12 @@ class ToolCallAgent(ReActAgent):
             # Check if result is a ToolResult with base64_image
             if hasattr(result, "base64_image") and result.base64_image:
                 # Store the base64_image for later use in tool_message
-                self._current_base64_image = result.base64_image
-
-                # Format result for display
-                observation = (
-                    f"Observed output of cmd `{name}` executed:\n{str(result)}"
-                    if result
-                    else f"Cmd `{name}` completed with no output"
-                )
-                return observation
-
-            # Format result for display (standard case)
-            observation = (
-                f"Observed output of cmd `{name}` executed:\n{str(result)}"
-                if result
-                else f"Cmd `{name}` completed with no output"
-            )
+                self._tool_images[command.id] = result.base64_image
 
-            return observation
+            # Format result for display
+            if not result:
+                return f"Cmd `{name}` completed with no output"
+            return f"Observed output of cmd `{name}` executed:\n{result}"
         except json.JSONDecodeError:
             error_msg = f"Error parsing arguments for {name}: Invalid JSON format"
             logger.error(
@@ -99,6 +99,18 @@ class SandboxSettings(BaseModel):
     )
 
 
+class PlanningSettings(BaseModel):
+    """Configuration for the planning flow"""
+
+    plan_cache_path: Optional[Path] = Field(
+        None,
+        description="JSON file caching completed plans for reuse; keep it outside workspace/",
+    )
+    plan_cache_ttl: float = Field(
+        7 * 24 * 60 * 60, description="Seconds a cached plan stays reusable"
+    )
+
+
 class MCPServerConfig(BaseModel):
     """Configuration for a single MCP server"""
 
@@ -158,6 +170,9 @@ class AppConfig(BaseModel):
         None, description="Search configuration"
     )
     mcp_config: Optional[MCPSettings] = Field(None, description="MCP configuration")
+    planning_config: Optional[PlanningSettings] = Field(
+        None, description="Planning flow configuration"
+    )
 
     class Config:
         arbitrary_types_allowed = True
@@ -269,6 +284,16 @@ class Config:
         else:
             mcp_settings = MCPSettings(servers=MCPSettings.load_server_config())
 
+        planning_config = raw_config.get("planning", {})
+        planning_settings = None
+        if planning_config:
+            planning_settings = PlanningSettings(**planning_config)
+            if planning_settings.plan_cache_path:
+                # Relative paths are taken from the project root, like config/
+                planning_settings.plan_cache_path = (
+                    PROJECT_ROOT / planning_settings.plan_cache_path.expanduser()
+                )
+
         config_dict = {
             "llm": {
                 "default": default_settings,
@@ -281,6 +306,7 @@ class Config:
             "browser_config": browser_settings,
             "search_config": search_settings,
             "mcp_config": mcp_settings,
+            "planning_config": planning_settings,
         }
 
         self._config = AppConfig(**config_dict)
@@ -306,6 +332,11 @@ class Config:
         """Get the MCP configuration"""
         return self._config.mcp_config
 
+    @property
+    def planning_config(self) -> Optional[PlanningSettings]:
+        """Get the planning flow configuration"""
+        return self._config.planning_config
+
     @property
     def workspace_root(self) -> Path:
         """Get the workspace root directory"""
@@ -1,7 +1,15 @@
+import asyncio
+import hashlib
 import json
+import os
+import random
+import re
+import tempfile
 import time
+from collections import Counter
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 
 from pydantic import Field
 
@@ -9,10 +17,30 @@ from app.agent.base import BaseAgent
 from app.flow.base import BaseFlow
 from app.llm import LLM
 from app.logger import logger
+from app.prompt.planning import (
+    PLAN_CREATION_SYSTEM_PROMPT,
+    PLAN_SUMMARY_SYSTEM_PROMPT,
+    STEP_EXECUTION_PROMPT,
+)
+from app.sandbox.client import SANDBOX_CLIENT
 from app.schema import AgentState, Message, ToolChoice
 from app.tool import PlanningTool
 
 
+# Step type tag embedded in plan step text, e.g. [SEARCH] or [CODE]
+_STEP_TYPE_RE = re.compile(r"\[([A-Z_]+)\]")
+# Dependency tag embedded in plan step text, e.g. [depends: 0, 2]
+_STEP_DEPENDS_RE = re.compile(r"\[depends:\s*([\d,\s]*)\]", re.IGNORECASE)
+_DIGITS_RE = re.compile(r"\d+")
+
+# Completed plans persisted across runs, keyed by the normalized request
+_PLAN_CACHE_SIZE = 128
+
+# System messages are static; LLM.format_messages only reads them
+_PLAN_CREATION_SYSTEM_MSG = Message.system_message(PLAN_CREATION_SYSTEM_PROMPT)
+_PLAN_SUMMARY_SYSTEM_MSG = Message.system_message(PLAN_SUMMARY_SYSTEM_PROMPT)
+
+
 class PlanStepStatus(str, Enum):
     """Enum class defining possible statuses of a plan step"""
 
@@ -24,7 +52,7 @@ class PlanStepStatus(str, Enum):
     @classmethod
     def get_all_statuses(cls) -> list[str]:
         """Return a list of all possible step status values"""
-        return [status.value for status in cls]
+        return list(_ALL_STATUSES)
 
     @classmethod
     def get_active_statuses(cls) -> list[str]:
@@ -34,12 +62,20 @@ class PlanStepStatus(str, Enum):
     @classmethod
     def get_status_marks(cls) -> Dict[str, str]:
         """Return a mapping of statuses to their marker symbols"""
-        return {
-            cls.COMPLETED.value: "[✓]",
-            cls.IN_PROGRESS.value: "[→]",
-            cls.BLOCKED.value: "[!]",
-            cls.NOT_STARTED.value: "[ ]",
-        }
+        return dict(_STATUS_MARKS)
+
+
+# Status lookups used on every scheduling pass, computed once
+_ALL_STATUSES = tuple(status.value for status in PlanStepStatus)
+_ACTIVE_STATUSES = frozenset(
+    {PlanStepStatus.NOT_STARTED.value, PlanStepStatus.IN_PROGRESS.value}
+)
+_STATUS_MARKS = {
+    PlanStepStatus.COMPLETED.value: "[✓]",
+    PlanStepStatus.IN_PROGRESS.value: "[→]",
+    PlanStepStatus.BLOCKED.value: "[!]",
+    PlanStepStatus.NOT_STARTED.value: "[ ]",
+}
 
 
 class PlanningFlow(BaseFlow):
@@ -50,6 +86,26 @@ class PlanningFlow(BaseFlow):
     executor_keys: List[str] = Field(default_factory=list)
     active_plan_id: str = Field(default_factory=lambda: f"plan_{int(time.time())}")
     current_step_index: Optional[int] = None
+    # Failed steps are retried with exponential backoff, then marked blocked
+    max_step_attempts: int = 3
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 30.0
+    # Upper bound on steps dispatched together, including the current one
+    max_parallel_steps: int = 4
+    # Opt-in JSON file of completed plans, reused for identical requests. Keep
+    # it outside the workspace, which agents are free to read and modify.
+    plan_cache_path: Optional[Path] = None
+    plan_cache_ttl: float = 7 * 24 * 60 * 60
+    _planning_tool_param: Optional[dict] = None
+    _plan_cache_key: Optional[str] = None
+    # (status list, index) before which every step is completed or blocked
+    _step_cursor: Optional[Tuple[list, int]] = None
+    # Step type parsed from each distinct step text
+    _step_type_cache: Dict[str, Optional[str]] = {}
+    # (steps list, dependencies) parsed from the [depends: ...] tags of a plan
+    _step_depends_cache: Optional[Tuple[list, Optional[List[List[int]]]]] = None
+    # (plan snapshot, rendered text) of the last plan text served
+    _plan_text_cache: Optional[Tuple[tuple, str]] = None
 
     def __init__(
         self, agents: Union[BaseAgent, List[BaseAgent], Dict[str, BaseAgent]], **data
@@ -74,6 +130,9 @@ class PlanningFlow(BaseFlow):
         if not self.executor_keys:
             self.executor_keys = list(self.agents.keys())
 
+        # The planning tool schema is static, build its function spec once
+        self._planning_tool_param = self.planning_tool.to_param()
+
     def get_executor(self, step_type: Optional[str] = None) -> BaseAgent:
         """
         Get an appropriate executor agent for the current step.
@@ -97,38 +156,73 @@ class PlanningFlow(BaseFlow):
             if not self.primary_agent:
                 raise ValueError("No primary agent available")
 
-            # Create initial plan if input provided
-            if input_text:
-                await self._create_initial_plan(input_text)
-
-                # Verify plan was created successfully
-                if self.active_plan_id not in self.planning_tool.plans:
-                    logger.error(
-                        f"Plan creation failed. Plan ID {self.active_plan_id} not found in planning tool."
-                    )
-                    return f"Failed to create plan for: {input_text}"
+            # Create initial plan if input provided, letting the agents set up
+            # meanwhile. Warmup stays on this task because agent resources such
+            # as MCP sessions must be closed by the task that opened them.
+            plan_task = (
+                asyncio.create_task(self._create_initial_plan(input_text))
+                if input_text
+                else None
+            )
+            try:
+                for agent in self.agents.values():
+                    await agent.warmup()
+            except BaseException:
+                if plan_task:
+                    plan_task.cancel()
+                raise
+            if plan_task:
+                await plan_task
+
+            # Verify plan was created successfully
+            if input_text and self._get_plan_data() is None:
+                logger.error(
+                    f"Plan creation failed. Plan ID {self.active_plan_id} not found in planning tool."
+                )
+                return f"Failed to create plan for: {input_text}"
 
-            result = ""
+            result_parts: List[str] = []
+            step_failures: Dict[int, int] = {}
             while True:
                 # Get current step to execute
-                self.current_step_index, step_info = await self._get_current_step_info()
+                step_index, step_info = self._get_current_step_info()
+                self.current_step_index = step_index
 
                 # Exit if no more steps or plan completed
-                if self.current_step_index is None:
-                    result += await self._finalize_plan()
+                if step_index is None:
+                    result_parts.append(await self._finalize_plan())
                     break
 
-                # Execute current step with appropriate agent
+                # Execute current step with appropriate agent, alongside any
+                # independent steps that can run on other agents
                 step_type = step_info.get("type") if step_info else None
                 executor = self.get_executor(step_type)
-                step_result = await self._execute_step(executor, step_info)
-                result += step_result + "\n"
+                batch = [(step_index, step_info, executor)]
+                batch.extend(self._get_parallel_steps(executor))
+
+                # Each agent run ends by cleaning up the shared sandbox, so hold
+                # that off until every step of the batch has finished
+                async with SANDBOX_CLIENT.defer_cleanup():
+                    step_results = await asyncio.gather(
+                        *(
+                            self._execute_step(step_executor, info, index)
+                            for index, info, step_executor in batch
+                        )
+                    )
+                result_parts.extend(f"{step_result}\n" for step_result in step_results)
 
                 # Check if agent wants to terminate
-                if hasattr(executor, "state") and executor.state == AgentState.FINISHED:
+                if any(
+                    step_executor.state == AgentState.FINISHED
+                    for _, _, step_executor in batch
+                ):
                     break
 
-            return result
+                await self._handle_failed_steps(
+                    [index for index, _, _ in batch], step_failures
+                )
+
+            return "".join(result_parts)
         except Exception as e:
             logger.error(f"Error in PlanningFlow: {str(e)}")
             return f"Execution failed: {str(e)}"
@@ -137,12 +231,26 @@ class PlanningFlow(BaseFlow):
         """Create an initial plan based on the request using the flow's LLM and PlanningTool."""
         logger.info(f"Creating initial plan with ID: {self.active_plan_id}")
 
-        # Create a system message for plan creation
-        system_message = Message.system_message(
-            "You are a planning assistant. Create a concise, actionable plan with clear steps. "
-            "Focus on key milestones rather than detailed sub-steps. "
-            "Optimize for clarity and efficiency."
-        )
+        # Reuse the plan of an identical request that completed before
+        self._plan_cache_key = None
+        cache_key = None
+        if self.plan_cache_path:
+            normalized = " ".join(request.lower().split())
+            cache_key = hashlib.sha256(normalized.encode()).hexdigest()
+            plan_cache = await asyncio.to_thread(self._read_plan_cache)
+            cached_plan = plan_cache.get(cache_key)
+            if cached_plan and self._is_fresh_cached_plan(cached_plan):
+                cached_plan.pop("saved_at", None)
+                try:
+                    await self.planning_tool.execute(
+                        command="create", plan_id=self.active_plan_id, **cached_plan
+                    )
+                    # Not re-saved on completion, so saved_at keeps its original
+                    # time and the plan still expires after plan_cache_ttl
+                    logger.info("Reusing cached plan for this request")
+                    return
+                except Exception as e:
+                    logger.warning(f"Ignoring unusable cached plan: {e}")
 
         # Create a user message with the request
         user_message = Message.user_message(
@@ -152,32 +260,41 @@ class PlanningFlow(BaseFlow):
         # Call LLM with PlanningTool
         response = await self.llm.ask_tool(
             messages=[user_message],
-            system_msgs=[system_message],
-            tools=[self.planning_tool.to_param()],
+            system_msgs=[_PLAN_CREATION_SYSTEM_MSG],
+            tools=[self._planning_tool_param],
             tool_choice=ToolChoice.AUTO,
         )
 
-        # Process tool calls if present
-        if response.tool_calls:
-            for tool_call in response.tool_calls:
-                if tool_call.function.name == "planning":
-                    # Parse the arguments
-                    args = tool_call.function.arguments
-                    if isinstance(args, str):
-                        try:
-                            args = json.loads(args)
-                        except json.JSONDecodeError:
-                            logger.error(f"Failed to parse tool arguments: {args}")
-                            continue
-
-                    # Ensure plan_id is set correctly and execute the tool
-                    args["plan_id"] = self.active_plan_id
-
-                    # Execute the tool via ToolCollection instead of directly
-                    result = await self.planning_tool.execute(**args)
-
-                    logger.info(f"Plan creation result: {str(result)}")
-                    return
+        # Process the first planning tool call, if present
+        tool_call = next(
+            (
+                call
+                for call in response.tool_calls or []
+                if call.function.name == "planning"
+            ),
+            None,
+        )
+        if tool_call:
+            # Parse the arguments
+            args = tool_call.function.arguments
+            if isinstance(args, str):
+                try:
+                    args = json.loads(args)
+                except json.JSONDecodeError:
+                    logger.error(f"Failed to parse tool arguments: {args}")
+                    args = None
+
+            if args is not None:
+                # Ensure plan_id is set correctly and execute the tool
+                args["plan_id"] = self.active_plan_id
+
+                # Execute the tool via ToolCollection instead of directly
+                result = await self.planning_tool.execute(**args)
+
+                logger.info("Plan creation result: {}", result)
+                # Only a plan the LLM actually produced is worth caching
+                self._plan_cache_key = cache_key
+                return
 
         # If execution reached here, create a default plan
         logger.warning("Creating default plan")
@@ -192,137 +309,325 @@ class PlanningFlow(BaseFlow):
             }
         )
 
-    async def _get_current_step_info(self) -> tuple[Optional[int], Optional[dict]]:
+    def _read_plan_cache(self) -> Dict[str, dict]:
+        """Load the persisted plan cache, treating a missing or corrupt file as empty."""
+        try:
+            plan_cache = json.loads(self.plan_cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(plan_cache, dict):
+            return {}
+        return {
+            key: cached_plan
+            for key, cached_plan in plan_cache.items()
+            if isinstance(cached_plan, dict)
+        }
+
+    def _write_plan_cache(self, key: str, plan: dict) -> None:
+        """Store a plan in the persisted cache, evicting the oldest entries."""
+        plan_cache = {
+            cached_key: cached_plan
+            for cached_key, cached_plan in self._read_plan_cache().items()
+            if cached_key != key and self._is_fresh_cached_plan(cached_plan)
+        }
+        plan_cache[key] = {**plan, "saved_at": time.time()}
+        for stale_key in list(plan_cache)[:-_PLAN_CACHE_SIZE]:
+            del plan_cache[stale_key]
+
+        # Write to a temporary file first so readers never see a partial cache
+        self.plan_cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.plan_cache_path.parent,
+            suffix=".tmp",
+            delete=False,
+        ) as tmp_file:
+            json.dump(plan_cache, tmp_file, ensure_ascii=False)
+        try:
+            os.replace(tmp_file.name, self.plan_cache_path)
+        except OSError:
+            os.unlink(tmp_file.name)
+            raise
+
+    def _is_fresh_cached_plan(self, cached_plan: dict) -> bool:
+        """Check whether a cached plan was saved within the cache TTL."""
+        return time.time() - cached_plan.get("saved_at", 0) <= self.plan_cache_ttl
+
+    async def _cache_completed_plan(self) -> None:
+        """Persist the active plan for reuse if every one of its steps completed."""
+        plan_data = self._get_plan_data()
+        if not self.plan_cache_path or not self._plan_cache_key or not plan_data:
+            return
+
+        step_statuses = plan_data.get("step_statuses", [])
+        if not step_statuses or any(
+            status != PlanStepStatus.COMPLETED.value for status in step_statuses
+        ):
+            return
+
+        plan = {
+            "title": plan_data.get("title"),
+            "steps": list(plan_data.get("steps", [])),
+            "step_dependencies": plan_data.get("step_dependencies"),
+        }
+        try:
+            await asyncio.to_thread(self._write_plan_cache, self._plan_cache_key, plan)
+        except OSError as e:
+            logger.warning(f"Failed to save plan cache: {e}")
+
+    def _get_current_step_info(self) -> tuple[Optional[int], Optional[dict]]:
         """
         Parse the current plan to identify the first non-completed step's index and info.
         Returns (None, None) if no active step is found.
         """
-        if (
-            not self.active_plan_id
-            or self.active_plan_id not in self.planning_tool.plans
-        ):
+        plan_data = self._get_plan_data()
+        if plan_data is None:
             logger.error(f"Plan with ID {self.active_plan_id} not found")
             return None, None
 
         try:
-            # Direct access to plan data from planning tool storage
-            plan_data = self.planning_tool.plans[self.active_plan_id]
             steps = plan_data.get("steps", [])
             step_statuses = plan_data.get("step_statuses", [])
 
+            # Skip the steps already found finished, unless a plan create or
+            # update replaced the status list since
+            start = 0
+            if self._step_cursor and self._step_cursor[0] is step_statuses:
+                start = self._step_cursor[1]
+
             # Find first non-completed step
-            for i, step in enumerate(steps):
+            for i in range(start, len(steps)):
                 if i >= len(step_statuses):
                     status = PlanStepStatus.NOT_STARTED.value
                 else:
                     status = step_statuses[i]
 
-                if status in PlanStepStatus.get_active_statuses():
-                    # Extract step type/category if available
-                    step_info = {"text": step}
-
-                    # Try to extract step type from the text (e.g., [SEARCH] or [CODE])
-                    import re
-
-                    type_match = re.search(r"\[([A-Z_]+)\]", step)
-                    if type_match:
-                        step_info["type"] = type_match.group(1).lower()
-
-                    # Mark current step as in_progress
-                    try:
-                        await self.planning_tool.execute(
-                            command="mark_step",
-                            plan_id=self.active_plan_id,
-                            step_index=i,
-                            step_status=PlanStepStatus.IN_PROGRESS.value,
-                        )
-                    except Exception as e:
-                        logger.warning(f"Error marking step as in_progress: {e}")
-                        # Update step status directly if needed
-                        if i < len(step_statuses):
-                            step_statuses[i] = PlanStepStatus.IN_PROGRESS.value
-                        else:
-                            while len(step_statuses) < i:
-                                step_statuses.append(PlanStepStatus.NOT_STARTED.value)
-                            step_statuses.append(PlanStepStatus.IN_PROGRESS.value)
-
-                        plan_data["step_statuses"] = step_statuses
+                if status in _ACTIVE_STATUSES:
+                    self._step_cursor = (step_statuses, i)
+                    step_info = self._build_step_info(steps[i])
 
+                    # Mark current step as in_progress, unless it is being retried
+                    if status != PlanStepStatus.IN_PROGRESS.value:
+                        self._set_step_status(i, PlanStepStatus.IN_PROGRESS.value)
                     return i, step_info
 
+            self._step_cursor = (step_statuses, len(steps))
             return None, None  # No active step found
 
         except Exception as e:
             logger.warning(f"Error finding current step index: {e}")
             return None, None
 
-    async def _execute_step(self, executor: BaseAgent, step_info: dict) -> str:
-        """Execute the current step with the specified agent using agent.run()."""
-        # Prepare context for the agent with current plan status
-        plan_status = await self._get_plan_text()
-        step_text = step_info.get("text", f"Step {self.current_step_index}")
+    def _get_plan_data(self) -> Optional[dict]:
+        """Return the active plan's storage dict, or None if it does not exist."""
+        return self.planning_tool.plans.get(self.active_plan_id)
 
-        # Create a prompt for the agent to execute the current step
-        step_prompt = f"""
-        CURRENT PLAN STATUS:
-        {plan_status}
+    def _build_step_info(self, step: str) -> dict:
+        """Build the step info dict, including the step type tag if present."""
+        step_info = {"text": step}
+
+        # Try to extract step type from the text (e.g., [SEARCH] or [CODE]),
+        # parsing each distinct step text only once
+        if step not in self._step_type_cache:
+            type_match = _STEP_TYPE_RE.search(step)
+            self._step_type_cache[step] = (
+                type_match.group(1).lower() if type_match else None
+            )
+        step_type = self._step_type_cache[step]
+        if step_type:
+            step_info["type"] = step_type
 
-        YOUR CURRENT TASK:
-        You are now working on step {self.current_step_index}: "{step_text}"
+        return step_info
 
-        Please execute this step using the appropriate tools. When you're done, provide a summary of what you accomplished.
+    @staticmethod
+    def _parse_step_depends(steps: List[str]) -> Optional[List[List[int]]]:
         """
+        Read step dependencies from [depends: i, j] tags in the step text.
+        Untagged steps depend on the step before them. Returns None when no
+        step is tagged, which keeps the plan sequential.
+        """
+        dependencies = []
+        tagged = False
+        for i, step in enumerate(steps):
+            match = _STEP_DEPENDS_RE.search(step)
+            if match:
+                tagged = True
+                deps = map(int, _DIGITS_RE.findall(match.group(1)))
+                dependencies.append([dep for dep in deps if dep < i])
+            else:
+                dependencies.append([i - 1] if i else [])
+        return dependencies if tagged else None
+
+    def _get_parallel_steps(
+        self, current_executor: BaseAgent
+    ) -> List[Tuple[int, dict, BaseAgent]]:
+        """
+        Find steps after the current one that can run alongside it.
+        Only plans with declared step dependencies (or [depends: ...] step tags)
+        are parallelized, and each agent runs at most one step at a time.
+        """
+        plan_data = self._get_plan_data() or {}
+        steps = plan_data.get("steps", [])
+        dependencies = plan_data.get("step_dependencies")
+        if not dependencies:
+            # Plan updates replace the steps list, so parse its tags only once
+            if not self._step_depends_cache or self._step_depends_cache[0] is not steps:
+                self._step_depends_cache = (steps, self._parse_step_depends(steps))
+            dependencies = self._step_depends_cache[1]
+        if not dependencies or self.current_step_index is None:
+            return []
+
+        step_statuses = plan_data.get("step_statuses", [])
+        busy_executors = {id(current_executor)}
+        parallel_steps = []
+
+        for i in range(self.current_step_index + 1, min(len(steps), len(dependencies))):
+            if len(parallel_steps) + 1 >= self.max_parallel_steps:
+                break
+            if i >= len(step_statuses) or step_statuses[i] not in _ACTIVE_STATUSES:
+                continue
+            # Completed and blocked steps no longer hold up their dependents
+            if any(step_statuses[dep] in _ACTIVE_STATUSES for dep in dependencies[i]):
+                continue
+
+            step_info = self._build_step_info(steps[i])
+            executor = self.get_executor(step_info.get("type"))
+            if id(executor) in busy_executors:
+                continue
+
+            busy_executors.add(id(executor))
+            self._set_step_status(i, PlanStepStatus.IN_PROGRESS.value)
+            parallel_steps.append((i, step_info, executor))
+
+        return parallel_steps
+
+    async def _execute_step(
+        self, executor: BaseAgent, step_info: dict, step_index: Optional[int] = None
+    ) -> str:
+        """Execute a step (the current one by default) with the specified agent using agent.run()."""
+        if step_index is None:
+            step_index = self.current_step_index
+
+        # Prepare context for the agent with current plan status
+        plan_status = await self._get_plan_text()
+        step_text = step_info.get("text", f"Step {step_index}")
+
+        # Create a prompt for the agent to execute the current step
+        step_prompt = STEP_EXECUTION_PROMPT.format(
+            plan_status=plan_status, step_index=step_index, step_text=step_text
+        )
 
         # Use agent.run() to execute the step
         try:
             step_result = await executor.run(step_prompt)
 
             # Mark the step as completed after successful execution
-            await self._mark_step_completed()
+            self._mark_step_completed(step_index)
 
             return step_result
         except Exception as e:
-            logger.error(f"Error executing step {self.current_step_index}: {e}")
-            return f"Error executing step {self.current_step_index}: {str(e)}"
+            logger.error(f"Error executing step {step_index}: {e}")
+            return f"Error executing step {step_index}: {str(e)}"
 
-    async def _mark_step_completed(self) -> None:
-        """Mark the current step as completed."""
-        if self.current_step_index is None:
-            return
+    async def _handle_failed_steps(
+        self, step_indices: List[int], step_failures: Dict[int, int]
+    ) -> None:
+        """
+        Count attempts for steps that did not complete, block those that ran out of
+        attempts and back off before the rest are retried.
+        """
+        max_attempts = self.max_step_attempts
+        plan_data = self._get_plan_data() or {}
+        step_statuses = plan_data.get("step_statuses", [])
+        retry_attempts = []
+
+        for index in step_indices:
+            if (
+                index >= len(step_statuses)
+                or step_statuses[index] not in _ACTIVE_STATUSES
+            ):
+                continue
 
-        try:
-            # Mark the step as completed
-            await self.planning_tool.execute(
-                command="mark_step",
-                plan_id=self.active_plan_id,
-                step_index=self.current_step_index,
-                step_status=PlanStepStatus.COMPLETED.value,
+            step_failures[index] = step_failures.get(index, 0) + 1
+            if step_failures[index] < max_attempts:
+                retry_attempts.append(step_failures[index])
+                continue
+
+            logger.warning(
+                f"Step {index} failed {step_failures[index]} times, marking it as blocked"
             )
-            logger.info(
-                f"Marked step {self.current_step_index} as completed in plan {self.active_plan_id}"
+            self._set_step_status(
+                index,
+                PlanStepStatus.BLOCKED.value,
+                notes=f"Blocked after {step_failures[index]} failed attempts",
             )
-        except Exception as e:
-            logger.warning(f"Failed to update plan status: {e}")
-            # Update step status directly in planning tool storage
-            if self.active_plan_id in self.planning_tool.plans:
-                plan_data = self.planning_tool.plans[self.active_plan_id]
-                step_statuses = plan_data.get("step_statuses", [])
 
-                # Ensure the step_statuses list is long enough
-                while len(step_statuses) <= self.current_step_index:
-                    step_statuses.append(PlanStepStatus.NOT_STARTED.value)
+        if retry_attempts:
+            delay = min(
+                self.retry_max_delay,
+                self.retry_base_delay * 2 ** (max(retry_attempts) - 1)
+                + random.uniform(0, 1),
+            )
+            logger.warning(f"Retrying failed step(s) in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def _mark_step_completed(self, step_index: Optional[int] = None) -> None:
+        """Mark a step (the current one by default) as completed."""
+        if step_index is None:
+            step_index = self.current_step_index
+        if step_index is None:
+            return
+
+        self._set_step_status(step_index, PlanStepStatus.COMPLETED.value)
+        logger.info(
+            f"Marked step {step_index} as completed in plan {self.active_plan_id}"
+        )
 
-                # Update the status
-                step_statuses[self.current_step_index] = PlanStepStatus.COMPLETED.value
-                plan_data["step_statuses"] = step_statuses
+    def _set_step_status(
+        self, step_index: int, status: str, notes: Optional[str] = None
+    ) -> None:
+        """Set a step's status, and optionally its notes, directly in plan storage."""
+        plan_data = self._get_plan_data()
+        if plan_data is None:
+            logger.warning(f"Plan with ID {self.active_plan_id} not found")
+            return
+
+        # Ensure the lists are long enough before updating the step
+        step_statuses = plan_data.setdefault("step_statuses", [])
+        step_statuses.extend(
+            [PlanStepStatus.NOT_STARTED.value] * (step_index + 1 - len(step_statuses))
+        )
+        step_statuses[step_index] = status
+
+        if notes:
+            step_notes = plan_data.setdefault("step_notes", [])
+            step_notes.extend([""] * (step_index + 1 - len(step_notes)))
+            step_notes[step_index] = notes
 
     async def _get_plan_text(self) -> str:
-        """Get the current plan as formatted text."""
+        """Get the current plan as formatted text, re-rendering only if it changed."""
+        plan_data = self._get_plan_data()
+        snapshot = None
+        if plan_data:
+            snapshot = (
+                self.active_plan_id,
+                plan_data.get("title"),
+                tuple(plan_data.get("steps", ())),
+                tuple(plan_data.get("step_statuses", ())),
+                tuple(plan_data.get("step_notes", ())),
+            )
+            if self._plan_text_cache and self._plan_text_cache[0] == snapshot:
+                return self._plan_text_cache[1]
+
         try:
             result = await self.planning_tool.execute(
                 command="get", plan_id=self.active_plan_id
             )
-            return result.output if hasattr(result, "output") else str(result)
+            plan_text = result.output or str(result)
+            if snapshot is not None:
+                self._plan_text_cache = (snapshot, plan_text)
+            return plan_text
         except Exception as e:
             logger.error(f"Error getting plan: {e}")
             return self._generate_plan_text_from_storage()
@@ -330,77 +635,70 @@ class PlanningFlow(BaseFlow):
     def _generate_plan_text_from_storage(self) -> str:
         """Generate plan text directly from storage if the planning tool fails."""
         try:
-            if self.active_plan_id not in self.planning_tool.plans:
+            plan_data = self._get_plan_data()
+            if plan_data is None:
                 return f"Error: Plan with ID {self.active_plan_id} not found"
 
-            plan_data = self.planning_tool.plans[self.active_plan_id]
             title = plan_data.get("title", "Untitled Plan")
             steps = plan_data.get("steps", [])
             step_statuses = plan_data.get("step_statuses", [])
             step_notes = plan_data.get("step_notes", [])
 
             # Ensure step_statuses and step_notes match the number of steps
-            while len(step_statuses) < len(steps):
-                step_statuses.append(PlanStepStatus.NOT_STARTED.value)
-            while len(step_notes) < len(steps):
-                step_notes.append("")
-
-            # Count steps by status
-            status_counts = {status: 0 for status in PlanStepStatus.get_all_statuses()}
-
-            for status in step_statuses:
-                if status in status_counts:
-                    status_counts[status] += 1
+            step_statuses.extend(
+                [PlanStepStatus.NOT_STARTED.value] * (len(steps) - len(step_statuses))
+            )
+            step_notes.extend([""] * (len(steps) - len(step_notes)))
 
+            # Count steps by status in a single pass
+            status_counts = Counter(step_statuses)
             completed = status_counts[PlanStepStatus.COMPLETED.value]
+            in_progress = status_counts[PlanStepStatus.IN_PROGRESS.value]
+            blocked = status_counts[PlanStepStatus.BLOCKED.value]
+            not_started = status_counts[PlanStepStatus.NOT_STARTED.value]
             total = len(steps)
             progress = (completed / total) * 100 if total > 0 else 0
 
-            plan_text = f"Plan: {title} (ID: {self.active_plan_id})\n"
-            plan_text += "=" * len(plan_text) + "\n\n"
-
-            plan_text += (
-                f"Progress: {completed}/{total} steps completed ({progress:.1f}%)\n"
-            )
-            plan_text += f"Status: {status_counts[PlanStepStatus.COMPLETED.value]} completed, {status_counts[PlanStepStatus.IN_PROGRESS.value]} in progress, "
-            plan_text += f"{status_counts[PlanStepStatus.BLOCKED.value]} blocked, {status_counts[PlanStepStatus.NOT_STARTED.value]} not started\n\n"
-            plan_text += "Steps:\n"
-
-            status_marks = PlanStepStatus.get_status_marks()
+            header = f"Plan: {title} (ID: {self.active_plan_id})\n"
+            parts = [
+                header,
+                "=" * len(header) + "\n\n",
+                f"Progress: {completed}/{total} steps completed ({progress:.1f}%)\n",
+                f"Status: {completed} completed, {in_progress} in progress, ",
+                f"{blocked} blocked, {not_started} not started\n\n",
+                "Steps:\n",
+            ]
 
             for i, (step, status, notes) in enumerate(
                 zip(steps, step_statuses, step_notes)
             ):
                 # Use status marks to indicate step status
-                status_mark = status_marks.get(
-                    status, status_marks[PlanStepStatus.NOT_STARTED.value]
+                status_mark = _STATUS_MARKS.get(
+                    status, _STATUS_MARKS[PlanStepStatus.NOT_STARTED.value]
                 )
 
-                plan_text += f"{i}. {status_mark} {step}\n"
+                parts.append(f"{i}. {status_mark} {step}\n")
                 if notes:
-                    plan_text += f"   Notes: {notes}\n"
+                    parts.append(f"   Notes: {notes}\n")
 
-            return plan_text
+            return "".join(parts)
         except Exception as e:
             logger.error(f"Error generating plan text from storage: {e}")
             return f"Error: Unable to retrieve plan with ID {self.active_plan_id}"
 
     async def _finalize_plan(self) -> str:
         """Finalize the plan and provide a summary using the flow's LLM directly."""
+        await self._cache_completed_plan()
         plan_text = await self._get_plan_text()
 
         # Create a summary using the flow's LLM directly
         try:
-            system_message = Message.system_message(
-                "You are a planning assistant. Your task is to summarize the completed plan."
-            )
-
             user_message = Message.user_message(
                 f"The plan has been completed. Here is the final plan status:\n\n{plan_text}\n\nPlease provide a summary of what was accomplished and any final thoughts."
             )
 
             response = await self.llm.ask(
-                messages=[user_message], system_msgs=[system_message]
+                messages=[user_message], system_msgs=[_PLAN_SUMMARY_SYSTEM_MSG]
             )
 
             return f"Plan completed:\n\n{response}"
@@ -7,6 +7,7 @@ from openai import (
     AsyncAzureOpenAI,
     AsyncOpenAI,
     AuthenticationError,
+    DefaultAsyncHttpxClient,
     OpenAIError,
     RateLimitError,
 )
@@ -180,6 +181,8 @@ class TokenCounter:
 
 class LLM:
     _instances: Dict[str, "LLM"] = {}
+    # Connection pool shared by the OpenAI-compatible clients of all configs
+    _http_client: Optional[DefaultAsyncHttpxClient] = None
 
     def __new__(
         cls, config_name: str = "default", llm_config: Optional[LLMSettings] = None
@@ -225,14 +228,26 @@ class LLM:
                     base_url=self.base_url,
                     api_key=self.api_key,
                     api_version=self.api_version,
+                    http_client=self._get_http_client(),
                 )
             elif self.api_type == "aws":
                 self.client = BedrockClient()
             else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+                self.client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=self._get_http_client(),
+                )
 
             self.token_counter = TokenCounter(self.tokenizer)
 
+    @classmethod
+    def _get_http_client(cls) -> DefaultAsyncHttpxClient:
+        """Return the process-wide HTTP client, creating it on first use"""
+        if cls._http_client is None:
+            cls._http_client = DefaultAsyncHttpxClient()
+        return cls._http_client
+
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
         if not text:
@@ -445,15 +460,14 @@ class LLM:
             response = await self.client.chat.completions.create(**params, stream=True)
 
             collected_messages = []
-            completion_text = ""
             async for chunk in response:
                 chunk_message = chunk.choices[0].delta.content or ""
                 collected_messages.append(chunk_message)
-                completion_text += chunk_message
                 print(chunk_message, end="", flush=True)
 
             print()  # Newline after streaming
-            full_response = "".join(collected_messages).strip()
+            completion_text = "".join(collected_messages)
+            full_response = completion_text.strip()
             if not full_response:
                 raise ValueError("Empty response from streaming LLM")
 
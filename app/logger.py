@@ -1,5 +1,5 @@
 import sys
-from datetime import datetime
+import time
 
 from loguru import logger as _logger
 
@@ -14,15 +14,17 @@ def define_log_level(print_level="INFO", logfile_level="DEBUG", name: str = None
     global _print_level
     _print_level = print_level
 
-    current_date = datetime.now()
-    formatted_date = current_date.strftime("%Y%m%d%H%M%S")
+    formatted_date = time.strftime("%Y%m%d%H%M%S")
     log_name = (
         f"{name}_{formatted_date}" if name else formatted_date
     )  # name a log with prefix name
 
     _logger.remove()
     _logger.add(sys.stderr, level=print_level)
-    _logger.add(PROJECT_ROOT / f"logs/{log_name}.log", level=logfile_level)
+    # Write the log file from loguru's background thread so callers never wait on disk
+    _logger.add(
+        PROJECT_ROOT / f"logs/{log_name}.log", level=logfile_level, enqueue=True
+    )
     return _logger
 
 
@@ -42,14 +42,14 @@ class MCPServer:
 
         # Define the async function to be registered
         async def tool_method(**kwargs):
-            logger.info(f"Executing {tool_name}: {kwargs}")
+            logger.info("Executing {}: {}", tool_name, kwargs)
             result = await tool.execute(**kwargs)
 
-            logger.info(f"Result of {tool_name}: {result}")
+            logger.info("Result of {}: {}", tool_name, result)
 
             # Handle different types of results (match original logic)
-            if hasattr(result, "model_dump"):
-                return json.dumps(result.model_dump())
+            if hasattr(result, "model_dump_json"):
+                return result.model_dump_json()
             elif isinstance(result, dict):
                 return json.dumps(result)
             return result
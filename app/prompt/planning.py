@@ -25,3 +25,26 @@ Choose the most efficient path forward:
 
 Be concise in your reasoning, then select the appropriate tool or action.
 """
+
+PLAN_CREATION_SYSTEM_PROMPT = (
+    "You are a planning assistant. Create a concise, actionable plan with clear steps. "
+    "Focus on key milestones rather than detailed sub-steps. "
+    "Optimize for clarity and efficiency. "
+    "When some steps do not rely on the results of others, set step_dependencies "
+    "so independent steps can run in parallel: one list per step, holding only "
+    "the indices of earlier steps it needs."
+)
+
+PLAN_SUMMARY_SYSTEM_PROMPT = (
+    "You are a planning assistant. Your task is to summarize the completed plan."
+)
+
+STEP_EXECUTION_PROMPT = """
+Please execute the current task below using the appropriate tools. When you're done, provide a summary of what you accomplished.
+
+CURRENT PLAN STATUS:
+{plan_status}
+
+YOUR CURRENT TASK:
+You are now working on step {step_index}: "{step_text}"
+"""
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Protocol
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Protocol
 
 from app.config import SandboxSettings
 from app.sandbox.core.sandbox import DockerSandbox
@@ -89,6 +90,9 @@ class LocalSandboxClient(BaseSandboxClient):
     def __init__(self):
         """Initializes local sandbox client."""
         self.sandbox: Optional[DockerSandbox] = None
+        # Open defer_cleanup() blocks, and whether cleanup was asked for meanwhile
+        self._cleanup_holds = 0
+        self._cleanup_pending = False
 
     async def create(
         self,
@@ -182,8 +186,27 @@ class LocalSandboxClient(BaseSandboxClient):
             raise RuntimeError("Sandbox not initialized")
         await self.sandbox.write_file(path, content)
 
+    @asynccontextmanager
+    async def defer_cleanup(self) -> AsyncIterator[None]:
+        """Postpones cleanup requests until the block exits.
+
+        Used while several agents share the sandbox concurrently, so the first
+        one to finish does not tear it down under the others.
+        """
+        self._cleanup_holds += 1
+        try:
+            yield
+        finally:
+            self._cleanup_holds -= 1
+            if not self._cleanup_holds and self._cleanup_pending:
+                self._cleanup_pending = False
+                await self.cleanup()
+
     async def cleanup(self) -> None:
         """Cleans up resources."""
+        if self._cleanup_holds:
+            self._cleanup_pending = True
+            return
         if self.sandbox:
             await self.sandbox.cleanup()
             self.sandbox = None
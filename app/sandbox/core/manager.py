@@ -54,6 +54,7 @@ class SandboxManager:
         self._locks: Dict[str, asyncio.Lock] = {}
         self._global_lock = asyncio.Lock()
         self._active_operations: Set[str] = set()
+        self._idle_events: Dict[str, asyncio.Event] = {}
 
         # Cleanup task
         self._cleanup_task: Optional[asyncio.Task] = None
@@ -105,11 +106,14 @@ class SandboxManager:
                 raise KeyError(f"Sandbox {sandbox_id} not found")
 
             self._active_operations.add(sandbox_id)
+            idle_event = self._idle_events.setdefault(sandbox_id, asyncio.Event())
+            idle_event.clear()
             try:
                 self._last_used[sandbox_id] = asyncio.get_event_loop().time()
                 yield self._sandboxes[sandbox_id]
             finally:
                 self._active_operations.remove(sandbox_id)
+                idle_event.set()
 
     async def create_sandbox(
         self,
@@ -238,6 +242,7 @@ class SandboxManager:
         self._last_used.clear()
         self._locks.clear()
         self._active_operations.clear()
+        self._idle_events.clear()
 
         logger.info("Manager cleanup completed")
 
@@ -252,11 +257,11 @@ class SandboxManager:
                 logger.warning(
                     f"Sandbox {sandbox_id} has active operations, waiting for completion"
                 )
-                for _ in range(10):  # Wait at most 10 times
-                    await asyncio.sleep(0.5)
-                    if sandbox_id not in self._active_operations:
-                        break
-                else:
+                try:
+                    await asyncio.wait_for(
+                        self._idle_events[sandbox_id].wait(), timeout=5.0
+                    )
+                except asyncio.TimeoutError:
                     logger.warning(
                         f"Timeout waiting for sandbox {sandbox_id} operations to complete"
                     )
@@ -271,6 +276,7 @@ class SandboxManager:
                     self._sandboxes.pop(sandbox_id, None)
                     self._last_used.pop(sandbox_id, None)
                     self._locks.pop(sandbox_id, None)
+                    self._idle_events.pop(sandbox_id, None)
                     logger.info(f"Deleted sandbox {sandbox_id}")
         except Exception as e:
             logger.error(f"Error during cleanup of sandbox {sandbox_id}: {e}")
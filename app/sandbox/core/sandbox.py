@@ -4,7 +4,7 @@ import os
 import tarfile
 import tempfile
 import uuid
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
 
 import docker
 from docker.errors import NotFound
@@ -45,6 +45,8 @@ class DockerSandbox:
         self.client = docker.from_env()
         self.container: Optional[Container] = None
         self.terminal: Optional[AsyncDockerizedTerminal] = None
+        # Container directories already created by write_file
+        self._created_dirs: Set[str] = set()
 
     async def create(self) -> "DockerSandbox":
         """Creates and starts the sandbox container.
@@ -212,9 +214,11 @@ class DockerSandbox:
             resolved_path = self._safe_resolve_path(path)
             parent_dir = os.path.dirname(resolved_path)
 
-            # Create parent directory
-            if parent_dir:
+            # Create parent directory, once per sandbox
+            dir_cached = parent_dir in self._created_dirs
+            if parent_dir and not dir_cached:
                 await self.run_command(f"mkdir -p {parent_dir}")
+                self._created_dirs.add(parent_dir)
 
             # Prepare file data
             tar_stream = await self._create_tar_stream(
@@ -222,11 +226,26 @@ class DockerSandbox:
             )
 
             # Write file
-            await asyncio.to_thread(
-                self.container.put_archive, parent_dir or "/", tar_stream
-            )
+            try:
+                await asyncio.to_thread(
+                    self.container.put_archive, parent_dir or "/", tar_stream
+                )
+            except Exception:
+                # A directory created just now cannot be the cause
+                if not dir_cached:
+                    raise
+                # The cached directory may have been removed inside the
+                # container since it was created; recreate it and retry once
+                self._created_dirs.discard(parent_dir)
+                await self.run_command(f"mkdir -p {parent_dir}")
+                self._created_dirs.add(parent_dir)
+                tar_stream.seek(0)
+                await asyncio.to_thread(
+                    self.container.put_archive, parent_dir, tar_stream
+                )
 
         except Exception as e:
+            self._created_dirs.clear()
             raise RuntimeError(f"Failed to write file: {e}")
 
     def _safe_resolve_path(self, path: str) -> str:
@@ -446,6 +465,7 @@ class DockerSandbox:
                     errors.append(f"Container remove error: {e}")
                 finally:
                     self.container = None
+                    self._created_dirs.clear()
 
         except Exception as e:
             errors.append(f"General cleanup error: {e}")
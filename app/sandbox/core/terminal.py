@@ -16,6 +16,10 @@ from docker.errors import APIError
 from docker.models.containers import Container
 
 
+# Trailing "echo $?" exit-status probe left in the captured output
+_EXIT_STATUS_ECHO_RE = re.compile(r"\n\$ echo \$\$?.*$")
+
+
 class DockerSession:
     def __init__(self, container_id: str) -> None:
         """Initializes a Docker session.
@@ -199,7 +203,7 @@ class DockerSession:
                         raise
 
                 output = b"\n".join(result_lines).decode("utf-8")
-                output = re.sub(r"\n\$ echo \$\$?.*$", "", output)
+                output = _EXIT_STATUS_ECHO_RE.sub("", output)
 
                 return output
 
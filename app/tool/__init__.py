@@ -1,18 +1,46 @@
+import importlib
+from typing import TYPE_CHECKING
+
 from app.tool.base import BaseTool
 from app.tool.bash import Bash
-from app.tool.browser_use_tool import BrowserUseTool
 from app.tool.create_chat_completion import CreateChatCompletion
-from app.tool.deep_research import DeepResearch
 from app.tool.planning import PlanningTool
 from app.tool.str_replace_editor import StrReplaceEditor
 from app.tool.terminate import Terminate
 from app.tool.tool_collection import ToolCollection
-from app.tool.web_search import WebSearch
+
+
+if TYPE_CHECKING:
+    from app.tool.browser_use_tool import BrowserUseTool
+    from app.tool.deep_research import DeepResearch
+    from app.tool.web_search import WebSearch
+
+
+# Tools with heavy dependencies (browser_use/playwright, search engines) are
+# only imported on first access so importing `app.tool` stays cheap.
+# Agents look the browser tool up by this name without importing it.
+BROWSER_TOOL_NAME = "browser_use"
+
+_LAZY_TOOLS = {
+    "BrowserUseTool": "app.tool.browser_use_tool",
+    "DeepResearch": "app.tool.deep_research",
+    "WebSearch": "app.tool.web_search",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_TOOLS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    tool_class = getattr(importlib.import_module(module_name), name)
+    globals()[name] = tool_class
+    return tool_class
 
 
 __all__ = [
     "BaseTool",
     "Bash",
+    "BROWSER_TOOL_NAME",
     "BrowserUseTool",
     "DeepResearch",
     "Terminate",
@@ -8,6 +8,9 @@ class BaseTool(ABC, BaseModel):
     name: str
     description: str
     parameters: Optional[dict] = None
+    # Whether calls to this tool may run alongside other such calls from the
+    # same response; only set for tools without shared or ordered side effects
+    concurrency_safe: bool = False
 
     class Config:
         arbitrary_types_allowed = True
@@ -12,6 +12,7 @@ from pydantic_core.core_schema import ValidationInfo
 
 from app.config import config
 from app.llm import LLM
+from app.tool import BROWSER_TOOL_NAME
 from app.tool.base import BaseTool, ToolResult
 from app.tool.web_search import WebSearch
 
@@ -37,7 +38,7 @@ Context = TypeVar("Context")
 
 
 class BrowserUseTool(BaseTool, Generic[Context]):
-    name: str = "browser_use"
+    name: str = BROWSER_TOOL_NAME
     description: str = _BROWSER_DESCRIPTION
     parameters: dict = {
         "type": "object",
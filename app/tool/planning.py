@@ -1,7 +1,9 @@
 # tool/planning.py
+from collections import Counter
 from typing import Dict, List, Literal, Optional
 
 from app.exceptions import ToolError
+from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
 
 
@@ -10,6 +12,13 @@ A planning tool that allows the agent to create and manage plans for solving com
 The tool provides functionality for creating plans, updating plan steps, and tracking progress.
 """
 
+_STATUS_SYMBOLS = {
+    "not_started": "[ ]",
+    "in_progress": "[→]",
+    "completed": "[✓]",
+    "blocked": "[!]",
+}
+
 
 class PlanningTool(BaseTool):
     """
@@ -61,6 +70,11 @@ class PlanningTool(BaseTool):
                 "description": "Additional notes for a step. Optional for mark_step command.",
                 "type": "string",
             },
+            "step_dependencies": {
+                "description": "Optional, one entry per step listing the indices (0-based) of earlier steps it depends on. Steps with no dependencies between them may run in parallel. If omitted, steps run in order. Used with create and update commands.",
+                "type": "array",
+                "items": {"type": "array", "items": {"type": "integer"}},
+            },
         },
         "required": ["command"],
         "additionalProperties": False,
@@ -83,8 +97,9 @@ class PlanningTool(BaseTool):
             Literal["not_started", "in_progress", "completed", "blocked"]
         ] = None,
         step_notes: Optional[str] = None,
+        step_dependencies: Optional[List[List[int]]] = None,
         **kwargs,
-    ):
+    ) -> ToolResult:
         """
         Execute the planning tool with the given command and parameters.
 
@@ -96,12 +111,13 @@ class PlanningTool(BaseTool):
         - step_index: Index of the step to update (used with mark_step command)
         - step_status: Status to set for a step (used with mark_step command)
         - step_notes: Additional notes for a step (used with mark_step command)
+        - step_dependencies: Indices of earlier steps each step depends on (used with create and update commands)
         """
 
         if command == "create":
-            return self._create_plan(plan_id, title, steps)
+            return self._create_plan(plan_id, title, steps, step_dependencies)
         elif command == "update":
-            return self._update_plan(plan_id, title, steps)
+            return self._update_plan(plan_id, title, steps, step_dependencies)
         elif command == "list":
             return self._list_plans()
         elif command == "get":
@@ -118,7 +134,11 @@ class PlanningTool(BaseTool):
             )
 
     def _create_plan(
-        self, plan_id: Optional[str], title: Optional[str], steps: Optional[List[str]]
+        self,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]] = None,
     ) -> ToolResult:
         """Create a new plan with the given ID, title, and steps."""
         if not plan_id:
@@ -141,6 +161,13 @@ class PlanningTool(BaseTool):
                 "Parameter `steps` must be a non-empty list of strings for command: create"
             )
 
+        dependency_warning = ""
+        if step_dependencies is not None and not self._valid_step_dependencies(
+            step_dependencies, steps
+        ):
+            dependency_warning = self._ignored_dependencies_warning(step_dependencies)
+            step_dependencies = None
+
         # Create a new plan with initialized step statuses
         plan = {
             "plan_id": plan_id,
@@ -148,17 +175,22 @@ class PlanningTool(BaseTool):
             "steps": steps,
             "step_statuses": ["not_started"] * len(steps),
             "step_notes": [""] * len(steps),
+            "step_dependencies": step_dependencies,
         }
 
         self.plans[plan_id] = plan
         self._current_plan_id = plan_id  # Set as active plan
 
         return ToolResult(
-            output=f"Plan created successfully with ID: {plan_id}\n\n{self._format_plan(plan)}"
+            output=f"Plan created successfully with ID: {plan_id}{dependency_warning}\n\n{self._format_plan(plan)}"
         )
 
     def _update_plan(
-        self, plan_id: Optional[str], title: Optional[str], steps: Optional[List[str]]
+        self,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]] = None,
     ) -> ToolResult:
         """Update an existing plan with new title or steps."""
         if not plan_id:
@@ -201,9 +233,47 @@ class PlanningTool(BaseTool):
             plan["steps"] = steps
             plan["step_statuses"] = new_statuses
             plan["step_notes"] = new_notes
+            # Indices may have shifted, so old dependencies no longer apply
+            plan["step_dependencies"] = None
+
+        dependency_warning = ""
+        if step_dependencies is not None:
+            if self._valid_step_dependencies(step_dependencies, plan["steps"]):
+                plan["step_dependencies"] = step_dependencies
+            else:
+                plan["step_dependencies"] = None
+                dependency_warning = self._ignored_dependencies_warning(
+                    step_dependencies
+                )
 
         return ToolResult(
-            output=f"Plan updated successfully: {plan_id}\n\n{self._format_plan(plan)}"
+            output=f"Plan updated successfully: {plan_id}{dependency_warning}\n\n{self._format_plan(plan)}"
+        )
+
+    @staticmethod
+    def _valid_step_dependencies(
+        step_dependencies: List[List[int]], steps: List[str]
+    ) -> bool:
+        """Check that there is one entry per step, naming only earlier steps."""
+        return (
+            isinstance(step_dependencies, list)
+            and len(step_dependencies) == len(steps)
+            and all(
+                isinstance(dependencies, list)
+                and all(isinstance(dep, int) and 0 <= dep < i for dep in dependencies)
+                for i, dependencies in enumerate(step_dependencies)
+            )
+        )
+
+    @staticmethod
+    def _ignored_dependencies_warning(step_dependencies) -> str:
+        """Log and describe step dependencies that were dropped as invalid."""
+        # Dependencies only enable parallelism, so bad ones fall back to
+        # running the steps in order rather than failing the plan
+        logger.warning(f"Ignoring invalid step dependencies: {step_dependencies}")
+        return (
+            "\nIgnored invalid `step_dependencies`: each step needs one entry "
+            "listing only earlier steps. Steps will run in order."
         )
 
     def _list_plans(self) -> ToolResult:
@@ -213,17 +283,15 @@ class PlanningTool(BaseTool):
                 output="No plans available. Create a plan with the 'create' command."
             )
 
-        output = "Available plans:\n"
+        lines = ["Available plans:\n"]
         for plan_id, plan in self.plans.items():
             current_marker = " (active)" if plan_id == self._current_plan_id else ""
-            completed = sum(
-                1 for status in plan["step_statuses"] if status == "completed"
-            )
+            completed = plan["step_statuses"].count("completed")
             total = len(plan["steps"])
             progress = f"{completed}/{total} steps completed"
-            output += f"• {plan_id}{current_marker}: {plan['title']} - {progress}\n"
+            lines.append(f"• {plan_id}{current_marker}: {plan['title']} - {progress}\n")
 
-        return ToolResult(output=output)
+        return ToolResult(output="".join(lines))
 
     def _get_plan(self, plan_id: Optional[str]) -> ToolResult:
         """Get details of a specific plan."""
@@ -321,43 +389,37 @@ class PlanningTool(BaseTool):
 
     def _format_plan(self, plan: Dict) -> str:
         """Format a plan for display."""
-        output = f"Plan: {plan['title']} (ID: {plan['plan_id']})\n"
-        output += "=" * len(output) + "\n\n"
+        header = f"Plan: {plan['title']} (ID: {plan['plan_id']})\n"
+        parts = [header, "=" * len(header) + "\n\n"]
 
-        # Calculate progress statistics
+        # Calculate progress statistics in a single pass
         total_steps = len(plan["steps"])
-        completed = sum(1 for status in plan["step_statuses"] if status == "completed")
-        in_progress = sum(
-            1 for status in plan["step_statuses"] if status == "in_progress"
-        )
-        blocked = sum(1 for status in plan["step_statuses"] if status == "blocked")
-        not_started = sum(
-            1 for status in plan["step_statuses"] if status == "not_started"
-        )
+        status_counts = Counter(plan["step_statuses"])
+        completed = status_counts["completed"]
+        in_progress = status_counts["in_progress"]
+        blocked = status_counts["blocked"]
+        not_started = status_counts["not_started"]
 
-        output += f"Progress: {completed}/{total_steps} steps completed "
+        parts.append(f"Progress: {completed}/{total_steps} steps completed ")
         if total_steps > 0:
             percentage = (completed / total_steps) * 100
-            output += f"({percentage:.1f}%)\n"
+            parts.append(f"({percentage:.1f}%)\n")
         else:
-            output += "(0%)\n"
+            parts.append("(0%)\n")
 
-        output += f"Status: {completed} completed, {in_progress} in progress, {blocked} blocked, {not_started} not started\n\n"
-        output += "Steps:\n"
+        parts.append(
+            f"Status: {completed} completed, {in_progress} in progress, {blocked} blocked, {not_started} not started\n\n"
+        )
+        parts.append("Steps:\n")
 
         # Add each step with its status and notes
         for i, (step, status, notes) in enumerate(
             zip(plan["steps"], plan["step_statuses"], plan["step_notes"])
         ):
-            status_symbol = {
-                "not_started": "[ ]",
-                "in_progress": "[→]",
-                "completed": "[✓]",
-                "blocked": "[!]",
-            }.get(status, "[ ]")
-
-            output += f"{i}. {status_symbol} {step}\n"
+            status_symbol = _STATUS_SYMBOLS.get(status, "[ ]")
+
+            parts.append(f"{i}. {status_symbol} {step}\n")
             if notes:
-                output += f"   Notes: {notes}\n"
+                parts.append(f"   Notes: {notes}\n")
 
-        return output
+        return "".join(parts)
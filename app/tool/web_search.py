@@ -157,6 +157,7 @@ class WebSearch(BaseTool):
     """Search the web for information using various search engines."""
 
     name: str = "web_search"
+    concurrency_safe: bool = True
     description: str = """Search the web for real-time information about any topic.
     This tool returns comprehensive search results with relevant information, URLs, titles, and descriptions.
     If the primary search engine fails, it automatically falls back to alternative engines."""
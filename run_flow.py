@@ -2,15 +2,12 @@ import asyncio
 import time
 
 from app.agent.manus import Manus
+from app.config import config
 from app.flow.flow_factory import FlowFactory, FlowType
 from app.logger import logger
 
 
 async def run_flow():
-    agents = {
-        "manus": Manus(),
-    }
-
     try:
         prompt = input("Enter your prompt: ")
 
@@ -18,9 +15,15 @@ async def run_flow():
             logger.warning("Empty prompt provided.")
             return
 
+        # Build agents only once there is a prompt to run
+        agents = {
+            "manus": Manus(),
+        }
+        planning_config = config.planning_config
         flow = FlowFactory.create_flow(
             flow_type=FlowType.PLANNING,
             agents=agents,
+            **(planning_config.model_dump() if planning_config else {}),
         )
         logger.warning("Processing your request...")
 
@@ -0,0 +1,543 @@
+import asyncio
+import itertools
+import json
+import os
+import re
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from pydantic import Field
+
+from app.agent.base import BaseAgent
+from app.flow import planning
+from app.flow.planning import _PLAN_CACHE_SIZE, PlanningFlow
+from app.llm import LLM
+from app.sandbox.client import SANDBOX_CLIENT
+from app.schema import Function, ToolCall
+
+
+# Shared counter used to order agent run events across agents
+_ticks = itertools.count()
+
+
+class StubLLM(LLM):
+    """LLM double that answers planning requests with a fixed plan."""
+
+    def __new__(cls, *args, **kwargs):
+        return object.__new__(cls)
+
+    def __init__(
+        self,
+        steps: Optional[List[str]] = None,
+        step_dependencies: Optional[List[List[int]]] = None,
+    ):
+        self.steps = steps or ["Collect data", "Write report"]
+        self.step_dependencies = step_dependencies
+        self.ask_tool_calls = 0
+
+    async def ask_tool(self, **kwargs):
+        self.ask_tool_calls += 1
+        arguments = {"command": "create", "title": "Stub plan", "steps": self.steps}
+        if self.step_dependencies is not None:
+            arguments["step_dependencies"] = self.step_dependencies
+        tool_call = ToolCall(
+            id="call_0",
+            function=Function(name="planning", arguments=json.dumps(arguments)),
+        )
+        return SimpleNamespace(content=None, tool_calls=[tool_call])
+
+    async def ask(self, **kwargs):
+        return "summary"
+
+
+class StubAgent(BaseAgent):
+    """Agent double that records when it ran which plan step."""
+
+    delay: float = 0
+    # Number of runs that raise before the agent starts succeeding
+    failures: int = 0
+    attempts: int = 0
+    # (step index, start tick, end tick) of each successful run
+    runs: List[Tuple[int, int, int]] = Field(default_factory=list)
+
+    async def run(self, request: Optional[str] = None) -> str:
+        step_index = int(re.search(r"working on step (\d+)", request).group(1))
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise RuntimeError("step failed")
+        started = next(_ticks)
+        await asyncio.sleep(self.delay)
+        self.runs.append((step_index, started, next(_ticks)))
+        return f"{self.name} done"
+
+    async def step(self) -> str:
+        return ""
+
+
+def run_of(agent: StubAgent, step_index: int) -> Tuple[int, int]:
+    """Return the (start, end) ticks of the agent's run of a step."""
+    [run] = [run[1:] for run in agent.runs if run[0] == step_index]
+    return run
+
+
+def make_flow(**kwargs) -> PlanningFlow:
+    agents = kwargs.pop("agents", None) or [StubAgent(name="stub", llm=StubLLM())]
+    kwargs.setdefault("llm", StubLLM())
+    return PlanningFlow(agents=agents, **kwargs)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "cache" / "plans.json"
+
+
+def test_plan_cache_disabled_by_default():
+    """Tests that plans are only cached when a cache path is configured."""
+    assert make_flow().plan_cache_path is None
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_miss_then_hit(cache_path):
+    """Tests that a completed plan is reused for the same normalized request."""
+    first = make_flow(plan_cache_path=cache_path)
+    await first.execute("Write a report")
+    assert first.llm.ask_tool_calls == 1
+    assert cache_path.exists()
+
+    second = make_flow(plan_cache_path=cache_path, plan_id="plan_reused")
+    await second.execute("  write a   REPORT ")
+    assert second.llm.ask_tool_calls == 0
+    assert second.planning_tool.plans["plan_reused"]["steps"] == [
+        "Collect data",
+        "Write report",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_ignores_different_request(cache_path):
+    """Tests that a cached plan is not reused for another request."""
+    await make_flow(plan_cache_path=cache_path).execute("Write a report")
+
+    flow = make_flow(plan_cache_path=cache_path)
+    await flow.execute("Write a poem")
+    assert flow.llm.ask_tool_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_expires_after_ttl(cache_path):
+    """Tests that cached plans older than the TTL are ignored."""
+    await make_flow(plan_cache_path=cache_path).execute("Write a report")
+    plan_cache = json.loads(cache_path.read_text())
+    for cached_plan in plan_cache.values():
+        cached_plan["saved_at"] = time.time() - 120
+    cache_path.write_text(json.dumps(plan_cache))
+
+    flow = make_flow(plan_cache_path=cache_path, plan_cache_ttl=60)
+    await flow.execute("Write a report")
+    assert flow.llm.ask_tool_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_hit_keeps_original_saved_at(cache_path):
+    """Tests that reusing a cached plan does not restart its TTL."""
+    await make_flow(plan_cache_path=cache_path).execute("Write a report")
+    [saved_at] = [
+        plan["saved_at"] for plan in json.loads(cache_path.read_text()).values()
+    ]
+
+    flow = make_flow(plan_cache_path=cache_path)
+    await flow.execute("Write a report")
+
+    assert flow.llm.ask_tool_calls == 0
+    assert [
+        plan["saved_at"] for plan in json.loads(cache_path.read_text()).values()
+    ] == [saved_at]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "content",
+    ["{not json", "[]", '"plans"', '{"key": ["not", "a", "plan"]}'],
+)
+async def test_plan_cache_recovers_from_corrupt_file(cache_path, content):
+    """Tests that a corrupt cache file is treated as empty and then replaced."""
+    cache_path.parent.mkdir(parents=True)
+    cache_path.write_text(content)
+
+    flow = make_flow(plan_cache_path=cache_path)
+    await flow.execute("Write a report")
+    assert flow.llm.ask_tool_calls == 1
+    assert len(json.loads(cache_path.read_text())) == 1
+
+
+class ProseLLM(StubLLM):
+    """LLM double that answers the planning request without a tool call."""
+
+    async def ask_tool(self, **kwargs):
+        self.ask_tool_calls += 1
+        return SimpleNamespace(content="First analyze, then execute.", tool_calls=None)
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_skips_default_plans(cache_path):
+    """Tests that the fallback plan used without a planning tool call is not cached."""
+    await make_flow(llm=ProseLLM(), plan_cache_path=cache_path).execute(
+        "Write a report"
+    )
+    assert not cache_path.exists()
+
+    flow = make_flow(llm=ProseLLM(), plan_cache_path=cache_path)
+    await flow.execute("Write a report")
+    assert flow.llm.ask_tool_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_skips_unfinished_plans(cache_path):
+    """Tests that plans with steps that did not complete are not cached."""
+    flow = make_flow(
+        agents=[StubAgent(name="failing", llm=StubLLM(), failures=1)],
+        plan_cache_path=cache_path,
+        max_step_attempts=1,
+    )
+    await flow.execute("Write a report")
+    assert not cache_path.exists()
+
+
+def write_cache(path, entries):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(entries))
+
+
+def test_plan_cache_write_prunes_expired_entries(cache_path):
+    """Tests that expired entries are dropped whenever the cache is written."""
+    now = time.time()
+    write_cache(
+        cache_path,
+        {
+            "expired": {"steps": ["a"], "saved_at": now - 120},
+            "fresh": {"steps": ["b"], "saved_at": now},
+        },
+    )
+
+    make_flow(plan_cache_path=cache_path, plan_cache_ttl=60)._write_plan_cache(
+        "new", {"steps": ["c"]}
+    )
+
+    assert list(json.loads(cache_path.read_text())) == ["fresh", "new"]
+
+
+def test_plan_cache_write_keeps_newest_entries(cache_path):
+    """Tests that the cache is capped at _PLAN_CACHE_SIZE, evicting the oldest entries."""
+    now = time.time()
+    write_cache(
+        cache_path,
+        {
+            f"plan_{i}": {"steps": [str(i)], "saved_at": now}
+            for i in range(_PLAN_CACHE_SIZE + 2)
+        },
+    )
+
+    make_flow(plan_cache_path=cache_path)._write_plan_cache("new", {"steps": ["c"]})
+
+    plan_cache = json.loads(cache_path.read_text())
+    assert len(plan_cache) == _PLAN_CACHE_SIZE
+    assert "plan_2" not in plan_cache and "plan_3" in plan_cache
+    assert list(plan_cache)[-1] == "new"
+
+
+def test_plan_cache_write_replaces_file_from_temp_file(cache_path, monkeypatch):
+    """Tests that the cache is written to a temp file that then replaces it."""
+    replaced = []
+    real_replace = os.replace
+
+    def record_replace(src, dst):
+        replaced.append((Path(src), Path(dst)))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", record_replace)
+    make_flow(plan_cache_path=cache_path)._write_plan_cache("new", {"steps": ["c"]})
+
+    [(src, dst)] = replaced
+    assert src.parent == cache_path.parent and src.suffix == ".tmp"
+    assert dst == cache_path
+    assert list(cache_path.parent.iterdir()) == [cache_path]
+
+
+def test_plan_cache_write_failure_keeps_previous_file(cache_path, monkeypatch):
+    """Tests that a failed replace leaves the old cache and no temp file behind."""
+    write_cache(cache_path, {"old": {"steps": ["a"], "saved_at": time.time()}})
+    previous = cache_path.read_text()
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        make_flow(plan_cache_path=cache_path)._write_plan_cache("new", {"steps": ["c"]})
+
+    assert cache_path.read_text() == previous
+    assert list(cache_path.parent.iterdir()) == [cache_path]
+
+
+def make_agents(*names: str, delay: float = 0.05) -> Dict[str, StubAgent]:
+    return {name: StubAgent(name=name, llm=StubLLM(), delay=delay) for name in names}
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_in_parallel_on_different_agents():
+    """Tests that steps without pending dependencies are dispatched together."""
+    agents = make_agents("search", "code")
+    flow = make_flow(
+        agents=agents,
+        llm=StubLLM(
+            steps=["[SEARCH] Find sources", "[CODE] Build parser", "Combine results"],
+            step_dependencies=[[], [], [0, 1]],
+        ),
+    )
+    await flow.execute("Build a parser")
+
+    search_start, search_end = run_of(agents["search"], 0)
+    code_start, code_end = run_of(agents["code"], 1)
+    assert search_start < code_end and code_start < search_end
+    assert (
+        flow.planning_tool.plans[flow.active_plan_id]["step_statuses"]
+        == ["completed"] * 3
+    )
+
+
+@pytest.mark.asyncio
+async def test_steps_wait_for_their_dependencies():
+    """Tests that a step only starts once every step it depends on finished."""
+    agents = make_agents("search", "code")
+    flow = make_flow(
+        agents=agents,
+        llm=StubLLM(
+            steps=["[SEARCH] Find sources", "[CODE] Build parser", "Combine results"],
+            step_dependencies=[[], [0], [0, 1]],
+        ),
+    )
+    await flow.execute("Build a parser")
+
+    _, search_end = run_of(agents["search"], 0)
+    code_start, code_end = run_of(agents["code"], 1)
+    combine_start, _ = run_of(agents["search"], 2)
+    assert code_start > search_end
+    assert combine_start > code_end
+
+
+@pytest.mark.asyncio
+async def test_plans_without_dependencies_run_sequentially():
+    """Tests that steps are not parallelized unless dependencies are declared."""
+    agents = make_agents("search", "code")
+    flow = make_flow(
+        agents=agents,
+        llm=StubLLM(steps=["[SEARCH] Find sources", "[CODE] Build parser"]),
+    )
+    await flow.execute("Build a parser")
+
+    _, search_end = run_of(agents["search"], 0)
+    code_start, _ = run_of(agents["code"], 1)
+    assert code_start > search_end
+
+
+@pytest.mark.asyncio
+async def test_parallel_steps_respect_max_parallel_steps():
+    """Tests that at most max_parallel_steps steps are dispatched together."""
+    agents = make_agents("a", "b", "c", "d")
+    flow = make_flow(agents=agents, max_parallel_steps=2)
+    await flow.planning_tool.execute(
+        command="create",
+        plan_id=flow.active_plan_id,
+        title="Independent steps",
+        steps=["[A] one", "[B] two", "[C] three", "[D] four"],
+        step_dependencies=[[], [], [], []],
+    )
+
+    flow.current_step_index, _ = flow._get_current_step_info()
+    parallel_steps = flow._get_parallel_steps(agents["a"])
+
+    assert [index for index, _, _ in parallel_steps] == [1]
+    assert parallel_steps[0][2] is agents["b"]
+
+
+@pytest.mark.asyncio
+async def test_parallel_steps_use_each_agent_once():
+    """Tests that two steps for the same agent are not dispatched together."""
+    agents = make_agents("search", "code")
+    flow = make_flow(agents=agents)
+    await flow.planning_tool.execute(
+        command="create",
+        plan_id=flow.active_plan_id,
+        title="Independent steps",
+        steps=["[SEARCH] one", "[SEARCH] two", "[CODE] three"],
+        step_dependencies=[[], [], []],
+    )
+
+    flow.current_step_index, _ = flow._get_current_step_info()
+    parallel_steps = flow._get_parallel_steps(agents["search"])
+
+    assert [index for index, _, _ in parallel_steps] == [2]
+
+
+def test_parse_step_depends_reads_tags():
+    """Tests [depends: ...] tag parsing, including untagged and forward references."""
+    steps = [
+        "Find sources",
+        "Read docs [depends: ]",
+        "Summarize [depends: 0, 1]",
+        "Review",
+        "Publish [depends: 4, 5, 2]",
+    ]
+    assert PlanningFlow._parse_step_depends(steps) == [[], [], [0, 1], [2], [2]]
+
+
+def test_parse_step_depends_without_tags():
+    """Tests that plans without any dependency tag stay sequential."""
+    assert PlanningFlow._parse_step_depends(["Find sources", "Summarize"]) is None
+
+
+@pytest.mark.asyncio
+async def test_parallel_steps_from_depends_tags():
+    """Tests that [depends: ...] tags enable parallel steps without step_dependencies."""
+    agents = make_agents("search", "code")
+    flow = make_flow(agents=agents)
+    await flow.planning_tool.execute(
+        command="create",
+        plan_id=flow.active_plan_id,
+        title="Tagged steps",
+        steps=["[SEARCH] one", "[CODE] two [depends: ]", "[CODE] three"],
+    )
+
+    flow.current_step_index, _ = flow._get_current_step_info()
+    parallel_steps = flow._get_parallel_steps(agents["search"])
+
+    assert [index for index, _, _ in parallel_steps] == [1]
+
+
+@pytest.mark.asyncio
+async def test_failed_step_is_retried_until_it_succeeds():
+    """Tests that a failing step is retried and completes within max_step_attempts."""
+    agent = StubAgent(name="flaky", llm=StubLLM(), failures=2)
+    flow = make_flow(agents=[agent], max_step_attempts=3, retry_max_delay=0.001)
+    await flow.execute("Write a report")
+
+    plan = flow.planning_tool.plans[flow.active_plan_id]
+    assert agent.attempts == 4  # three runs of step 0, one of step 1
+    assert plan["step_statuses"] == ["completed", "completed"]
+
+
+@pytest.mark.asyncio
+async def test_step_is_blocked_after_max_step_attempts():
+    """Tests that a step that keeps failing is blocked and the plan moves on."""
+    agent = StubAgent(name="broken", llm=StubLLM(), failures=3)
+    flow = make_flow(agents=[agent], max_step_attempts=3, retry_max_delay=0.001)
+    await flow.execute("Write a report")
+
+    plan = flow.planning_tool.plans[flow.active_plan_id]
+    assert agent.attempts == 4
+    assert plan["step_statuses"] == ["blocked", "completed"]
+    assert plan["step_notes"][0] == "Blocked after 3 failed attempts"
+
+
+@pytest.mark.asyncio
+async def test_failed_steps_back_off_exponentially(monkeypatch):
+    """Tests failure counting and the capped exponential backoff between retries."""
+    delays = []
+
+    async def record_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(planning.asyncio, "sleep", record_sleep)
+    monkeypatch.setattr(planning.random, "uniform", lambda a, b: 0)
+
+    flow = make_flow(max_step_attempts=4, retry_base_delay=1.0, retry_max_delay=3.0)
+    await flow.planning_tool.execute(
+        command="create",
+        plan_id=flow.active_plan_id,
+        title="Retries",
+        steps=["Fails", "Completes"],
+    )
+    flow._set_step_status(1, "completed")
+
+    step_failures = {}
+    for _ in range(4):
+        await flow._handle_failed_steps([0, 1], step_failures)
+
+    plan = flow.planning_tool.plans[flow.active_plan_id]
+    assert delays == [1.0, 2.0, 3.0]
+    assert step_failures == {0: 4}
+    assert plan["step_statuses"] == ["blocked", "completed"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "step_dependencies",
+    [
+        [[], [0]],  # one entry short
+        [[], [1], []],  # self reference
+        [[], [0], [5]],  # forward reference
+    ],
+)
+async def test_malformed_planner_dependencies_run_plan_in_order(step_dependencies):
+    """Tests that bad step_dependencies from the planner fall back to sequential steps."""
+    agents = make_agents("search", "code")
+    flow = make_flow(
+        agents=agents,
+        llm=StubLLM(
+            steps=["[SEARCH] Find sources", "[CODE] Build parser", "Combine results"],
+            step_dependencies=step_dependencies,
+        ),
+    )
+    result = await flow.execute("Build a parser")
+
+    plan = flow.planning_tool.plans[flow.active_plan_id]
+    assert not result.startswith("Execution failed")
+    assert plan["step_dependencies"] is None
+    assert plan["step_statuses"] == ["completed"] * 3
+    _, search_end = run_of(agents["search"], 0)
+    code_start, code_end = run_of(agents["code"], 1)
+    combine_start, _ = run_of(agents["search"], 2)
+    assert search_end < code_start and code_end < combine_start
+
+
+class SandboxAgent(StubAgent):
+    """Agent double that uses the shared sandbox and cleans it up like BaseAgent.run."""
+
+    # Whether the sandbox was still there when each run finished its work
+    sandbox_alive: List[bool] = Field(default_factory=list)
+
+    async def run(self, request: Optional[str] = None) -> str:
+        result = await super().run(request)
+        self.sandbox_alive.append(SANDBOX_CLIENT.sandbox is not None)
+        await SANDBOX_CLIENT.cleanup()
+        return result
+
+
+@pytest.mark.asyncio
+async def test_parallel_steps_share_sandbox_until_batch_finishes(monkeypatch):
+    """Tests that a parallel step finishing first does not clean up the sandbox."""
+    cleanups = []
+
+    async def cleanup():
+        cleanups.append(True)
+
+    monkeypatch.setattr(SANDBOX_CLIENT, "sandbox", SimpleNamespace(cleanup=cleanup))
+    agents = {
+        "search": SandboxAgent(name="search", llm=StubLLM(), delay=0.01),
+        "code": SandboxAgent(name="code", llm=StubLLM(), delay=0.05),
+    }
+    flow = make_flow(
+        agents=agents,
+        llm=StubLLM(
+            steps=["[SEARCH] Find sources", "[CODE] Build parser"],
+            step_dependencies=[[], []],
+        ),
+    )
+    await flow.execute("Build a parser")
+
+    assert agents["code"].sandbox_alive == [True]
+    assert cleanups == [True]
+    assert SANDBOX_CLIENT.sandbox is None
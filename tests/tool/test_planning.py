@@ -0,0 +1,65 @@
+import pytest
+
+from app.tool.planning import PlanningTool
+
+
+STEPS = ["Find sources", "Read docs", "Summarize"]
+
+
+@pytest.mark.asyncio
+async def test_create_stores_step_dependencies():
+    """Tests that valid step dependencies are stored with the plan."""
+    tool = PlanningTool()
+    await tool.execute(
+        command="create",
+        plan_id="plan",
+        title="Research",
+        steps=STEPS,
+        step_dependencies=[[], [0], [0, 1]],
+    )
+    assert tool.plans["plan"]["step_dependencies"] == [[], [0], [0, 1]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "step_dependencies",
+    [
+        [[], [2], []],  # forward reference
+        [[], [1], []],  # self reference
+        [[], [-1], []],  # negative index
+        [[], ["0"], []],  # not an index
+        [[], [0]],  # one entry short
+        [[], 0, []],  # entry is not a list
+    ],
+)
+async def test_create_ignores_invalid_step_dependencies(step_dependencies):
+    """Tests that invalid dependencies are dropped so the plan runs in order."""
+    tool = PlanningTool()
+    result = await tool.execute(
+        command="create",
+        plan_id="plan",
+        title="Research",
+        steps=STEPS,
+        step_dependencies=step_dependencies,
+    )
+    assert "Ignored invalid `step_dependencies`" in result.output
+    assert tool.plans["plan"]["steps"] == STEPS
+    assert tool.plans["plan"]["step_dependencies"] is None
+
+
+@pytest.mark.asyncio
+async def test_update_ignores_forward_step_dependencies():
+    """Tests that updating a plan with invalid dependencies makes it sequential."""
+    tool = PlanningTool()
+    await tool.execute(
+        command="create",
+        plan_id="plan",
+        title="Research",
+        steps=STEPS,
+        step_dependencies=[[], [0], [0]],
+    )
+    result = await tool.execute(
+        command="update", plan_id="plan", step_dependencies=[[1], [], []]
+    )
+    assert "Ignored invalid `step_dependencies`" in result.output
+    assert tool.plans["plan"]["step_dependencies"] is None